@@ -1,6 +1,8 @@
 import matplotlib.pyplot as plt
 import numpy as np
 
+from matplotlib.patches import ConnectionPatch
+
 
 
 def draw_axes_crossing_line( ax1:plt.axes, ax2:plt.axes, xy_data:tuple, xy_derivative:tuple) -> None:
@@ -12,32 +14,31 @@ def draw_axes_crossing_line( ax1:plt.axes, ax2:plt.axes, xy_data:tuple, xy_deriv
         xy_data (tuple): The position within the mean intensity axes
         xy_derivative (tuple): The position within the derivative axes
     """
-    ax1.annotate(
-        '', 
-        xy= (xy_data[0], xy_data[1]), 
-        xytext= (xy_data[0], xy_data[1]),
-        xycoords= ax1.transData, 
-        textcoords= ax2.transData, 
-        arrowprops= dict(
-            facecolor='black', 
-            arrowstyle='-', 
-            linestyle='dashed',
-            clip_on=False
-        )
-    )
-    
-    ax2.annotate(
-        '', 
-        xy= (xy_data[0], xy_data[1]), 
-        xytext= (xy_derivative[0], xy_derivative[1]),
-        xycoords= ax1.transData, 
-        textcoords= ax2.transData, 
-        arrowprops= dict(
-            facecolor='black', 
-            arrowstyle='-', 
-            linestyle='dashed'
-        )
-    )
+    # A ConnectionPatch works out both ends at draw time, so the line keeps
+    # following the data when the limits or the layout change later on
+    ax2.figure.add_artist(ConnectionPatch(
+        xyA= xy_data,
+        coordsA= ax1.transData,
+        xyB= xy_derivative,
+        coordsB= ax2.transData,
+        shrinkA= 2,
+        shrinkB= 2,
+        color= 'black',
+        linestyle= 'dashed'
+    ))
+
+def draw_axes_crossing_lines( ax1:plt.axes, ax2:plt.axes, x:np.ndarray, y_data:np.ndarray, y_derivative:np.ndarray) -> None:
+    """Draw the fancy dotted lines between the two axes, one line per x position.
+
+    Args:
+        ax1 (plt.axes): The mean intensity axes
+        ax2 (plt.axes): The derivative axes
+        x (np.ndarray): The x positions of the lines
+        y_data (np.ndarray): The y positions within the mean intensity axes
+        y_derivative (np.ndarray): The y positions within the derivative axes
+    """
+    for x_pos, y_pos_data, y_pos_derivative in zip(x, y_data, y_derivative):
+        draw_axes_crossing_line(ax1, ax2, (x_pos, y_pos_data), (x_pos, y_pos_derivative))
 
 def draw_diagonal_splits( ax1:plt.axes, ax2:plt.axes, size:float = 0.005) -> None:
     """Draw the diagonal splits between the two axes
@@ -72,16 +73,10 @@ def draw_mean_and_derivative_plot( mean_intensity_profile:np.ndarray, intensity_
     ax1.plot(mean_intensity_profile, color = 'black')
     ax2.plot(intensity_profile_derivative, color = 'red', linestyle='-.')
     
-    for le, te in zip(leading_edges, trailing_edges):
-        # Draw x-markers at the local maxima and minima
-        ax2.scatter(le, intensity_profile_derivative[le], color='black', marker='x')
-        ax2.scatter(te, intensity_profile_derivative[te], color='black', marker='x')
-        
-        # Make the dotted line between the two axes to show where the derivative
-        # matches the location on the data. To keep this a bit cleaner a function was
-        # made..
-        draw_axes_crossing_line(ax1, ax2, (le, mean_intensity_profile[le]), (le, intensity_profile_derivative[le]))
-        draw_axes_crossing_line(ax1, ax2, (te, mean_intensity_profile[te]), (te, intensity_profile_derivative[te]))
+    # Draw x-markers at the local maxima and minima, one scatter for all of them
+    # instead of one per edge
+    ax2.scatter(leading_edges, intensity_profile_derivative[leading_edges], color='black', marker='x')
+    ax2.scatter(trailing_edges, intensity_profile_derivative[trailing_edges], color='black', marker='x')
     
     # Styling the plot
     ax1.spines['bottom'].set_visible(False)
@@ -97,5 +92,11 @@ def draw_mean_and_derivative_plot( mean_intensity_profile:np.ndarray, intensity_
     plt.subplots_adjust(hspace=0.05)
     draw_diagonal_splits(ax1, ax2)
     
+    # Make the dotted line between the two axes to show where the derivative
+    # matches the location on the data. To keep this a bit cleaner a function was
+    # made..
+    edges = np.concatenate([leading_edges, trailing_edges])
+    draw_axes_crossing_lines(ax1, ax2, edges, mean_intensity_profile[edges], intensity_profile_derivative[edges])
+    
     if filename != "":
         plt.savefig(f'{filename}_profile.png', bbox_inches='tight')
\ No newline at end of file
@@ -1,9 +1,37 @@
 import cv2
+import functools
 import numpy as np
 import scipy.signal
+import scipy.ndimage
+import torch
 import easyocr as ocr
-from skimage.transform import radon
+from concurrent.futures import ThreadPoolExecutor
 
+# The easyocr reader loads its models onto the GPU when it is made, which takes
+# a couple of seconds. So we only make it once and reuse it for every image.
+_READER = None
+
+# Fixed batch size for the easyocr recognition step
+OCR_BATCH_SIZE = 16
+
+# Below this amount of lines starting threads costs more than it saves
+PARALLEL_LINE_COUNT = 8
+
+def _get_reader() -> ocr.Reader:
+    """Get the shared easyocr reader, it is made on the first call.
+
+    Returns:
+        ocr.Reader: The easyocr reader
+    """
+    global _READER
+    if _READER is None:
+        # The scale crop is always the same size so cudnn can pick the fastest kernels
+        _READER = ocr.Reader(['en'], gpu=True, cudnn_benchmark=True)
+
+        # Let cudnn find its kernels on an empty crop now, instead of on the first real image
+        with torch.inference_mode():
+            _READER.readtext(np.zeros((95, 95, 3), np.uint8), detail = 0, batch_size = OCR_BATCH_SIZE)
+    return _READER
 
 def get_str_from_img( image: np.ndarray) -> str:
     """Get the string from the provided image using easyocr
@@ -15,16 +43,16 @@ def get_str_from_img( image: np.ndarray) -> str:
         str: String from the image
     """
 
-    reader = ocr.Reader(['en'], gpu=True)
     # We use detail = 0 to just get the text, we dont care for the other info
-    text_str = reader.readtext(image, detail = 0)
+    text_str = _get_reader().readtext(image, detail = 0, batch_size = OCR_BATCH_SIZE)
     return text_str
 
-def get_scale_bar_size( image: np.ndarray) -> int:
-    """As the scalebar in the SEM images is dynamic get the size of the line with the help of cv2.
+def get_scale_bar_size( image: np.ndarray, treshold:int = 127) -> int:
+    """As the scalebar in the SEM images is dynamic get the size of the line from the bright pixels in the info bar.
 
     Args:
         image (np.ndarray): Image of the info bar at the bottom of the SEM image
+        treshold (int, optional): Pixels brighter than this value are part of the scale bar. Defaults to 127.
 
     Returns:
         int: Length of the scale bar in pixels
@@ -32,23 +60,19 @@ def get_scale_bar_size( image: np.ndarray) -> int:
 
     scale_img = image[0:125, 200:1250]
 
-    # Standard settings from multiple tutorials.
-    edges = cv2.Canny(scale_img, 50, 150, apertureSize = 3)
-    lines = cv2.HoughLinesP(
-                edges,              # Input edge image
-                1,                  # Distance resolution in pixels
-                np.pi/180,          # Angle resolution in radians
-                threshold=100,      # Min number of votes for valid line
-                minLineLength=5,    # Min allowed length of line
-                maxLineGap=10       # Max allowed gap between line for joining them
-    )
+    # The scale bar is a bright horizontal line on a dark background and is the only thing
+    # in this crop, so we don't need edge or line detection. Squash the crop into one row
+    # of 'is there something bright in this column' and find the longest bright run.
+    columns = (scale_img > treshold).any(axis=0).astype(np.int8)
+    run_edges = np.flatnonzero(np.diff(np.concatenate(([0], columns, [0]))))
+    run_starts, run_ends = run_edges[::2], run_edges[1::2]
 
     # So why is there this random -6 you may ask, and that would be a good question.
     # The scale bar in the SEM image has two sort of 'ticks' at the end who mark the
     # beginning and the end of the line. The pixels of these ticks do get counted in
     # the line length estimation and we don't want that. It was found that they are 
     # both 3 pixels wide, so 2 x 3 is... tada! Magic number -6!
-    return int(lines[0][0][2] - lines[0][0][0]) - 6
+    return int((run_ends - run_starts).max()) - 6
 
 
 def get_scale( image:np.ndarray, return_all = False, return_pm = False) -> float | tuple | tuple:
@@ -80,6 +104,41 @@ def get_scale( image:np.ndarray, return_all = False, return_pm = False) -> float
 
     return scale
 
+def get_scales_batched( images:list) -> list:
+    """Get the scale from multiple SEM images at once. The scale crops of all images are read
+    by easyocr in one batch, which is faster than calling get_scale for every image when there
+    are a lot of images (roughly 15 or more).
+
+    Args:
+        images (list): List of complete SEM images before cropping or other processing.
+
+    Returns:
+        list: For every image a tuple of the scale string from the image, the integer from that
+        string and the scale.
+    """
+    if len(images) == 0:
+        return []
+
+    infobars = [image[image.shape[0] - 95:image.shape[0], 0:image.shape[1]] for image in images]
+
+    # readtext_batched needs all images to be the same size
+    crops = []
+    for infobar in infobars:
+        scale_img = infobar[0:infobar.shape[0], 0:95]
+        if scale_img.shape[:2] != (95, 95):
+            scale_img = cv2.resize(scale_img, (95, 95))
+        crops.append(scale_img)
+
+    # _get_reader already did the warm up, so the first batch isn't slower than the rest
+    scale_strs = _get_reader().readtext_batched(crops, n_width=95, n_height=95, detail=0)
+
+    scales = []
+    for infobar, text_str in zip(infobars, scale_strs):
+        scale_str = text_str[0]
+        scale_int = int(scale_str)
+        scales.append((scale_str, scale_int, scale_int / get_scale_bar_size(infobar)))
+    return scales
+
 def crop_image(image:np.ndarray, top_margin:int, bottom_margin:int, left_margin:int, right_margin:int) -> np.ndarray:
     """Crop a given image according to given margins
 
@@ -93,9 +152,88 @@ def crop_image(image:np.ndarray, top_margin:int, bottom_margin:int, left_margin:
     Returns:
         np.ndarray: The cropped image
     """
-    width, height= image.shape
+    # The rows are the height and the columns the width, basic slicing keeps this a view
+    height, width = image.shape[:2]
     return image[top_margin:height-bottom_margin, left_margin:width-right_margin]
 
+def _fft_radon( image:np.ndarray, theta:np.ndarray = None, order:int = 1) -> np.ndarray:
+    """Radon transform using the Fourier slice theorem. The projection of an image at an angle is
+    the inverse FFT of the line through the 2D FFT of the image at that same angle. So one 2D FFT
+    and a 1D inverse FFT per angle, instead of rotating the whole image for every angle.
+    The angles follow the same convention as skimage.transform.radon.
+
+    Args:
+        image (np.ndarray): Image you want the sinogram of.
+        theta (np.ndarray, optional): Projection angles in degrees. Defaults to np.arange(180).
+        order (int, optional): Order of the spline interpolation of the slices. Defaults to 1.
+
+    Returns:
+        np.ndarray: Sinogram with a column for every angle.
+    """
+    if theta is None:
+        theta = np.arange(180)
+
+    # Pad to a square as big as the diagonal so the projections at every angle fit
+    image = np.asarray(image, dtype=float)
+    diagonal = int(np.ceil(np.sqrt(2) * max(image.shape)))
+    pad = [((diagonal - s + 1) // 2, (diagonal - s) // 2) for s in image.shape]
+    padded = np.pad(image, pad)
+
+    fimg = np.fft.fftshift(np.fft.fft2(np.fft.ifftshift(padded)))
+
+    # Coordinates of the slice through the middle of the spectrum for every angle
+    center = diagonal // 2
+    r = np.arange(diagonal) - center
+    t = np.deg2rad(theta)
+    coords = [center - np.outer(r, np.sin(t)), center + np.outer(r, np.cos(t))]
+
+    # map_coordinates only does real data so do the real and imaginary part separately
+    slices = scipy.ndimage.map_coordinates(fimg.real, coords, order=order) \
+        + 1j * scipy.ndimage.map_coordinates(fimg.imag, coords, order=order)
+
+    # Every column is one angle, so inverse FFT them all at once
+    sinogram = np.fft.fftshift(np.fft.ifft(np.fft.ifftshift(slices, axes=0), axis=0), axes=0)
+    return sinogram.real
+
+def _torch_radon( image:np.ndarray, theta:np.ndarray = None, device:str = 'cuda') -> np.ndarray:
+    """Same Fourier slice radon transform as _fft_radon, but done with torch so it can run on
+    the GPU that easyocr is already using. All angle slices are sampled with one grid_sample
+    call and inverse transformed with one batched FFT.
+
+    Args:
+        image (np.ndarray): Image you want the sinogram of.
+        theta (np.ndarray, optional): Projection angles in degrees. Defaults to np.arange(180).
+        device (str, optional): Torch device to do the transform on. Defaults to 'cuda'.
+
+    Returns:
+        np.ndarray: Sinogram with a column for every angle.
+    """
+    if theta is None:
+        theta = np.arange(180)
+
+    image = np.asarray(image, dtype=np.float32)
+    diagonal = int(np.ceil(np.sqrt(2) * max(image.shape)))
+    pad = [((diagonal - s + 1) // 2, (diagonal - s) // 2) for s in image.shape]
+    padded = torch.from_numpy(np.pad(image, pad)).to(device)
+
+    fimg = torch.fft.fftshift(torch.fft.fft2(torch.fft.ifftshift(padded)))
+
+    # grid_sample wants the (x, y) sample positions scaled to [-1, 1]
+    center = diagonal // 2
+    r = torch.arange(diagonal, device=device, dtype=torch.float32) - center
+    t = torch.deg2rad(torch.as_tensor(theta, device=device, dtype=torch.float32))
+    rows = center - torch.outer(torch.sin(t), r)
+    cols = center + torch.outer(torch.cos(t), r)
+    grid = torch.stack([cols, rows], dim=-1) / (diagonal - 1) * 2 - 1
+
+    # Sample the real and imaginary plane in one go, giving an [angles, diagonal] slice for each
+    planes = torch.stack([fimg.real, fimg.imag])[None]
+    sampled = torch.nn.functional.grid_sample(planes, grid[None], mode='bilinear', align_corners=True)[0]
+    slices = torch.complex(sampled[0], sampled[1])
+
+    sinogram = torch.fft.fftshift(torch.fft.ifft(torch.fft.ifftshift(slices, dim=-1), dim=-1), dim=-1)
+    return sinogram.real.T.cpu().numpy()
+
 def get_angle( image:np.ndarray) -> int:
     """Get the angle at which the image is projected using the radon function.
 
@@ -105,13 +243,18 @@ def get_angle( image:np.ndarray) -> int:
     Returns:
         int: Array of indices into the array.
     """
-    sinogram = radon(image)
+    # Use the GPU when we have one, it is already warm from easyocr anyway
+    if torch.cuda.is_available():
+        sinogram = _torch_radon(image)
+    else:
+        sinogram = _fft_radon(image)
 
     # In short what happens:
     # Thanks to the radon function we find the most prevalent angle
     # And now we want to get that angle from the radon which is given as an image.
-    rms_vals = np.array([np.sqrt(np.mean(np.abs(line) ** 2)) for line in sinogram.transpose()])
-    angle = np.argmax(rms_vals)
+    # The sinogram is real so the rms of every column (angle) is just the sqrt of the mean square.
+    rms_vals = np.sqrt(np.einsum('ij,ij->j', sinogram, sinogram) / sinogram.shape[0])
+    angle = int(np.argmax(rms_vals))
     return -angle
 
 
@@ -125,7 +268,13 @@ def normalize_1D_array( array: np.ndarray) -> np.ndarray:
     Returns:
         np.ndarray: Normalized array
     """
-    normalize_values = (array - min(array)) / (max(array) - min(array))
+    # float32 is plenty for pixel intensities and is half the memory of float64
+    array = np.asarray(array, dtype=np.float32)
+
+    # Use the ndarray min and max, the builtin min and max walk the array in python
+    array_min = array.min()
+    array_max = array.max()
+    normalize_values = (array - array_min) * (1.0 / (array_max - array_min))
     return normalize_values
 
 def get_intensity_profile( image:np.ndarray, row:int, invert_profile:bool = True) -> np.ndarray:
@@ -143,6 +292,25 @@ def get_intensity_profile( image:np.ndarray, row:int, invert_profile:bool = True
         return 1-normalize_1D_array(image[row, :])
     else: 
         return normalize_1D_array(image[row, :])
+
+def get_intensity_profiles( image:np.ndarray, invert_profile:bool = True) -> np.ndarray:
+    """Get the intensity profile of every row in the image at once, same as calling
+    get_intensity_profile for every row.
+
+    Args:
+        image (np.ndarray): The image you want to analyse.
+        invert_profile (bool, optional): Invert profile in case your colors were inverted. Defaults to True.
+
+    Returns:
+        np.ndarray: The intensity profiles with one row per image row.
+    """
+    block = image.astype(np.float32, copy=False)
+    row_min = block.min(axis=1, keepdims=True)
+    row_max = block.max(axis=1, keepdims=True)
+    row_profiles = (block - row_min) / (row_max - row_min)
+    if invert_profile:
+        row_profiles = 1 - row_profiles
+    return row_profiles
     
 def get_intensity_profile_dy( intensity_profile:np.ndarray, scale_factor:int = 5) -> np.ndarray:
     """Get the derivative of the intensity profile.
@@ -154,27 +322,40 @@ def get_intensity_profile_dy( intensity_profile:np.ndarray, scale_factor:int = 5
     Returns:
         np.ndarray: Derivative of the intensity profile.
     """
-    return np.diff(intensity_profile * scale_factor)
+    # diff is linear, so scaling afterwards gives the same result without a scaled copy of the profile
+    return np.diff(intensity_profile) * scale_factor
 
-def get_mean_intensity_profile( image:np.ndarray, starting_row: int = 0, ending_row: int = 20) -> np.ndarray:
+def get_mean_intensity_profile( image:np.ndarray, starting_row: int = 0, ending_row: int = 20, invert_profile:bool = True) -> np.ndarray:
     """Get the mean intensity profile over a given range of rows.
 
     Args:
         image (np.ndarray): The image you want to analyse.
         starting_row (int, optional): What is the first row of your range. Defaults to 0.
         ending_row (int, optional): What is the last row of your range. Defaults to 20.
+        invert_profile (bool, optional): Invert profile in case your colors were inverted. Defaults to True.
 
     Returns:
         np.ndarray: The mean intensity profile over a given range
     """
-    row_profile_list = np.empty(ending_row - starting_row, dtype=object)
-    for row in range(starting_row, ending_row):
-        row_profile = get_intensity_profile(image, row)
-        row_profile_list[row - starting_row] = row_profile
-    mean_data = np.mean(row_profile_list)
+    row_profiles = get_intensity_profiles(image[starting_row:ending_row], invert_profile)
+    mean_data = row_profiles.mean(axis=0)
     return mean_data
 
-def filter_data( data:np.ndarray, filter_order:int = 3, cutoff_freq:float = 0.1) -> np.ndarray:
+@functools.lru_cache(maxsize=16)
+def _butter_sos( filter_order:int, cutoff_freq:float) -> np.ndarray:
+    """Get the second order sections of a Butterworth filter. Only a couple of filters are used
+    so the coefficients are cached instead of calculated on every filter_data call.
+
+    Args:
+        filter_order (int): The order of the filter.
+        cutoff_freq (float): The critical frequency or frequencies.
+
+    Returns:
+        np.ndarray: The second order sections of the filter.
+    """
+    return scipy.signal.butter(filter_order, cutoff_freq, output='sos')
+
+def filter_data( data:np.ndarray, filter_order:int = 3, cutoff_freq:float = 0.1, axis:int = -1) -> np.ndarray:
     """Simple Buterworth filter the make analysis of data easier when needed.
     # https://stackoverflow.com/questions/35588782/how-to-average-a-signal-to-remove-noise-with-python
 
@@ -182,12 +363,13 @@ def filter_data( data:np.ndarray, filter_order:int = 3, cutoff_freq:float = 0.1)
         data (np.ndarray): The data that you want to filter
         filter_order (int, optional): The order of the filter. Defaults to 3.
         cutoff_freq (float, optional): The critical frequency or frequencies. Defaults to 0.1.
+        axis (int, optional): The axis to filter along, so multiple profiles can be filtered at once. Defaults to -1.
 
     Returns:
         np.ndarray: Filtered data.
     """
-    B, A = scipy.signal.butter(filter_order, cutoff_freq, output='ba')
-    return scipy.signal.filtfilt(B, A, data)
+    # Second order sections are better conditioned than the (b, a) form for higher orders
+    return scipy.signal.sosfiltfilt(_butter_sos(filter_order, cutoff_freq), data, axis=axis)
 
 def get_leading_edge_positions( intensity_profile_derivative:np.ndarray, treshold:float = 0.1) -> np.ndarray:
     """Find the leading edges by looking up the peaks in the derivative profile. 
@@ -225,7 +407,7 @@ def get_translation( intensity_profile:np.ndarray, scale:float) -> tuple:
         scale (float): The scale determined from the image
 
     Returns:
-        tuple: (A list of translation values, the std of this translation)
+        tuple: (An array of translation values, the std of this translation)
     """
     dy = filter_data(get_intensity_profile_dy(intensity_profile))
     
@@ -235,12 +417,16 @@ def get_translation( intensity_profile:np.ndarray, scale:float) -> tuple:
     
     # Assuming your first line is the first layer you'll always want
     # an uneven amount of lines to do the following calculations. More info
-    # on this is in the report
-    n = int(len(le)/2)-1
+    # on this is in the report. Every translation also needs two trailing edges,
+    # so only use as many lines as both edge arrays can fill.
+    n = max(min(int(len(le)/2)-1, int(len(te)/2)), 0)
     
-    # Calculate the translation for every second line
-    T = [(((le[(i + 1) * 2] - te[i * 2 + 1]) - (le[i * 2 + 1] - te[i * 2])) * scale)/2 for i in range(n)]
-    std = np.std(T)
+    # Calculate the translation for every second line, the even and odd
+    # edges are the edges of the first and second layer respectively
+    le_even, le_odd = le[::2], le[1::2]
+    te_even, te_odd = te[::2], te[1::2]
+    T = ((le_even[1:n + 1] - te_odd[:n]) - (le_odd[:n] - te_even[:n])) * (scale * 0.5)
+    std = T.std()
     
     return T, std
 
@@ -248,20 +434,50 @@ def get_translation( intensity_profile:np.ndarray, scale:float) -> tuple:
 def get_rotation( image:np.ndarray, scale:float) -> tuple:
     y, _ = image.shape
 
-    translations_top = get_translation(get_mean_intensity_profile(image, 10, 11), scale)
-    translations_bottom = get_translation(get_mean_intensity_profile(image, y-1, y), scale)
+    translations_top, _ = get_translation(get_mean_intensity_profile(image, 10, 11), scale)
+    translations_bottom, _ = get_translation(get_mean_intensity_profile(image, y-1, y), scale)
     
-    angle = []
-    for i in range(min(len(translations_bottom[0]), len(translations_top[0]))):
-        angle.append(np.rad2deg((np.arctan2(translations_top[0][i] - translations_bottom[0][i], (y * scale)))))
+    n = min(len(translations_bottom), len(translations_top))
+    angle = np.rad2deg(np.arctan2(translations_top[:n] - translations_bottom[:n], y * scale))
     
     angle = np.abs(angle)/2
     
-    R = np.mean(angle)
-    std = np.std(angle)
+    R = angle.mean()
+    std = angle.std()
 
     return R, std
 
+def _get_line_width( image:np.ndarray, mean_intensity_profile:np.ndarray, peak:int, valley:int, scale:float, margin:int) -> tuple:
+    """Get the line width and its error for one line, used by get_line_width_data.
+
+    Args:
+        image (np.ndarray): Image containing the lines.
+        mean_intensity_profile (np.ndarray): The mean intensity profile.
+        peak (int): The leading edge of the line
+        valley (int): The trailing edge of the line
+        scale (float): The scale determined from the image
+        margin (int): How many pixels of padding to take around the line
+
+    Returns:
+        tuple: (Line width, std of line width)
+    """
+    # Get the linewidth by substracting the position of the valley (trailing edge)
+    # by the position of the peak (leading edge)
+    line_width = (valley - peak) * scale
+    
+    img_slice = image[:, peak - margin:valley + margin]
+    data_slice = mean_intensity_profile[peak - margin:valley + margin]
+    
+    # Calculate the LW error according to the formula in the report
+    # It is a bit rough tho due to time, so this could be way better
+    # All rows of the slice are filtered in one go, every row gives one difference
+    filtered_rows = filter_data(get_intensity_profiles(img_slice), 1, 0.1, axis=1)
+    # Clamp the difference first and then square it, squaring only the filtered row was a mistake
+    clamped = np.maximum(data_slice - filtered_rows, 0.0)
+    LW_differences = np.sqrt((clamped * clamped).sum(axis=1)) * scale
+
+    return line_width, np.std(LW_differences)
+
 def get_line_width_data(image:np.ndarray, mean_intensity_profile:np.ndarray, leading_edges:np.ndarray, trailing_edges:np.ndarray, scale:float, debug:bool = False) -> tuple:
     """Get the line width data for every line in a given image.
 
@@ -279,28 +495,22 @@ def get_line_width_data(image:np.ndarray, mean_intensity_profile:np.ndarray, lea
     # Some functions get very sad if you don't pad the data a bit, so give it some space
     margin = 10
     
+    # Every line starts with a peak and end with a valley in the dy spectrum so loop through them
+    edges = list(zip(leading_edges, trailing_edges))
+    get_line = lambda edge: _get_line_width(image, mean_intensity_profile, edge[0], edge[1], scale, margin)
+
+    # The lines don't depend on each other so with enough of them spread them over threads.
+    # The filtering in scipy and numpy releases the GIL, and threads don't have to copy the image.
+    if len(edges) >= PARALLEL_LINE_COUNT:
+        with ThreadPoolExecutor() as executor:
+            results = list(executor.map(get_line, edges))
+    else:
+        results = [get_line(edge) for edge in edges]
+
     line_widths = []
     line_stds = []
-    # Every line starts with a peak and end with a valley in the dy spectrum so loop through them
-    for peak, valley in zip(leading_edges, trailing_edges):
-        # Get the linewidth by substracting the position of the valley (trailing edge)
-        # by the position of the peak (leading edge)
-        line_width = (valley - peak) * scale
+    for line_width, std in results:
         line_widths.append(line_width)
-        
-        img_slice = image[:, peak - margin:valley + margin]
-        data_slice = mean_intensity_profile[peak - margin:valley + margin]
-        y, _ = img_slice.shape
-        
-        # Calculate the LW error according to the formula in the report
-        # It is a bit rough tho due to time, so this could be way better
-        LW_differences = np.array([
-            np.sqrt(
-                sum(np.maximum(data_slice - filter_data(get_intensity_profile(img_slice, row), 1, 0.1)**2, 0))) * scale 
-                for row in range(y)
-        ])
-    
-        std = np.std(LW_differences)
         line_stds.append(std)
         
         if debug:
@@ -4,7 +4,8 @@ import klayout.db as db
 import matplotlib.pyplot as plt
 
 from enum import Enum
-from matplotlib.patches import Rectangle, Circle
+from matplotlib.colors import to_rgba
+from matplotlib.collections import PolyCollection, EllipseCollection
 
 class ORIENTATION(Enum):
     TOP = 0
@@ -14,6 +15,127 @@ class ORIENTATION(Enum):
 
 # The colors I used for the display at the bottom of the notebook, nothing special
 COLORS = ["#fcba03", "#a63019", "#1c67b8"]
+
+MID_TICK_HEIGHT = 50 # micrometer
+
+# For every orientation, indexed by ORIENTATION.value: are the ticks placed along the y axis,
+# and on which side (+1 or -1) of the center line the main scale goes. The vernier scale goes on the other side.
+VERNIER_ORIENTATIONS = np.array([
+    [0, 1],     # TOP
+    [1, 1],     # RIGHT
+    [0, -1],    # BOTTOM
+    [1, -1]     # LEFT
+], dtype=np.int8)
+
+def get_vernier_ticks(x:float, y:float, ms_spacing:float, vs_spacing:float, width:float, max_length:float, orientation:ORIENTATION) -> tuple:
+    """Calculate the boxes of all ticks of a vernier scale at once.
+
+    Args:
+        x (float): x position of the mid point of the vernier scale
+        y (float): y position of the mid point of the vernier scale
+        ms_spacing (float): the spacing between the ticks on the main scale
+        vs_spacing (float): the spacing between the ticks on the second scale
+        width (float): the width of the ticks
+        max_length (float): the maximum length the scale is allowed to be
+        orientation (ORIENTATION): the orientation of the scale in cardinal directions
+
+    Returns:
+        tuple: (main scale boxes, vernier scale boxes), both arrays with a (left, bottom, right, top) row per tick
+    """
+    vertical, side = VERNIER_ORIENTATIONS[orientation.value]
+
+    # Determine the amount of ticks/stalke there will be, the middle tick is added separately
+    number_of_ticks = max_length / (width + ms_spacing)
+    n = np.arange(1, int(np.ceil(number_of_ticks / 2)))
+    heights = np.where(n % 10 == 0, 40, 25) # height in micrometers
+
+    def scale_ticks(spacing:float, side:int) -> np.ndarray:
+        # Middle tick, then the ticks in positive and negative direction
+        centers = np.concatenate(([0], n * (width + spacing), -n * (width + spacing)))
+        tick_heights = np.concatenate(([MID_TICK_HEIGHT], heights, heights)) * side
+
+        along_low, along_high = centers - width / 2, centers + width / 2
+        across_low, across_high = np.minimum(tick_heights, 0), np.maximum(tick_heights, 0)
+
+        if vertical:
+            return np.column_stack((x + across_low, y + along_low, x + across_high, y + along_high))
+        return np.column_stack((x + along_low, y + across_low, x + along_high, y + across_high))
+
+    return scale_ticks(ms_spacing, side), scale_ticks(vs_spacing, -side)
+
+def get_cross_boxes(x:float, y:float, width:float, height:float) -> np.ndarray:
+    """Get the boxes of the two bars that make up a cross.
+
+    Args:
+        x (float): What is the x position of the midpoint of this cross
+        y (float): What is the y position of the midpoint of this cross
+        width (float): What is the width of this cross
+        height (float): What is the height of this cross
+
+    Returns:
+        np.ndarray: Array with a (left, bottom, right, top) row for both bars
+    """
+    return np.array([
+        (x - width/2, y - height/2, x + width/2, y + height/2),
+        (x - height/2, y - width/2, x + height/2, y + width/2)
+    ])
+
+def to_dbu(values:np.ndarray, dbu:float) -> np.ndarray:
+    """Convert micrometers to integer database units, rounding half away from zero like KLayout does.
+
+    Args:
+        values (np.ndarray): Values in micrometers
+        dbu (float): Data base unit, so what size in microns is one unit.
+
+    Returns:
+        np.ndarray: The values in integer database units
+    """
+    values = np.asarray(values, dtype=float) / dbu
+    return np.trunc(values + np.copysign(0.5, values)).astype(np.int64)
+
+def get_regular_grid(positions:tuple, dbu:float) -> tuple | None:
+    """Check if the positions fill a regular grid, every x combined with every y with even steps.
+    The check is exact in database units, positions that are only close to a grid are not a grid.
+
+    Args:
+        positions (tuple): The (x, y) positions in micrometers
+        dbu (float): Data base unit, so what size in microns is one unit.
+
+    Returns:
+        tuple | None: (x, y, dx, dy, nx, ny) of the grid starting at the lowest x and y in database units, None if the positions are not a regular grid
+    """
+    points = to_dbu(positions, dbu).reshape(-1, 2)
+    if len(points) == 0:
+        return None
+
+    xs = np.unique(points[:, 0])
+    ys = np.unique(points[:, 1])
+
+    # Every grid point has to be there exactly once
+    if len(points) != len(xs) * len(ys) or len(np.unique(points, axis=0)) != len(points):
+        return None
+
+    # And the steps have to be the same everywhere
+    x_steps = np.diff(xs)
+    y_steps = np.diff(ys)
+    if not (np.all(x_steps == x_steps[:1]) and np.all(y_steps == y_steps[:1])):
+        return None
+
+    dx = int(x_steps[0]) if len(x_steps) else 0
+    dy = int(y_steps[0]) if len(y_steps) else 0
+    return int(xs[0]), int(ys[0]), dx, dy, len(xs), len(ys)
+
+def boxes_to_vertices(boxes:np.ndarray) -> np.ndarray:
+    """Turn (left, bottom, right, top) boxes into the corner vertices mpl collections want.
+
+    Args:
+        boxes (np.ndarray): Array with a (left, bottom, right, top) row per box
+
+    Returns:
+        np.ndarray: Array of shape (boxes, 4, 2) with the corners of every box
+    """
+    left, bottom, right, top = np.asarray(boxes, dtype=float).T
+    return np.stack([left, bottom, right, bottom, right, top, left, top], axis=-1).reshape(-1, 4, 2)
   
 class Designer():
     """Wrapper class to call both the Notebook function as de Klayout functions."""
@@ -25,8 +147,8 @@ class Designer():
             layout (db.Layout): A pya layout.
             dbu (float): Data base unit, so what size in microns is one unit.
             layer_amount (int): How many layers are there in the design
-            ax (plt.axes): plt.axes to show in the designer
-            temp_filename (str): Temporary filename
+            ax (plt.axes): plt.axes to show in the designer, None to only make the GDS file
+            temp_filename (str): Temporary filename, not written anymore but kept so existing notebooks keep working
             marker_filename (str): Filename of the marker
             output_filename (str): Filename of the final result
         """
@@ -35,7 +157,8 @@ class Designer():
         self.output_filename = output_filename
 
         self.kdrawer = KlayoutDrawer(layout, dbu, layer_amount, temp_filename, marker_filename, output_filename)
-        self.ndrawer = NotebookDrawer(ax)
+        # Without axes there is nothing to show, so skip all the notebook drawing
+        self.ndrawer = NotebookDrawer(ax) if ax is not None else NullDrawer()
 
     def vernier(self, x:int, y:int, ms_spacing:float, vs_spacing:float, width:int, ms_layerIdx:int, vs_layerIdx:int, max_length:int, orientation:ORIENTATION) -> None:
         """Generate a vernier scale
@@ -77,11 +200,12 @@ class Designer():
             height (int): What is the height of this cross
             layer (int): On what layer is the cross made
         """
-        self.bar(x, y , width, height, layer)
-        self.bar(x, y, height, width, layer)
+        self.kdrawer.construct_cross(x, y, width, height, layer)
+        self.ndrawer.render_cross(x, y, width, height, layer)
 
     def marker(self, layer:int, *positions:tuple) -> None:
         """Draw the marker from a specified file, else a default marker will be drawn.
+        Markers add up like the other shapes, calling this again keeps the markers of earlier calls.
 
         Args:
             layer (int): On what layer is the marker made
@@ -92,10 +216,12 @@ class Designer():
             print(f"Marker selected! GDS will contain: {self.marker_filename[:-4]} as a marker.")
         for pos in positions:
             self.ndrawer.render_marker(pos[0], pos[1], layer)
-            self.kdrawer.construct_marker(*positions)
+        self.ndrawer.flush()
+        self.kdrawer.construct_marker(*positions)
 
     def draw(self) -> None:
         """Draw the layout"""
+        self.ndrawer.flush()
         self.kdrawer.draw()
 
 
@@ -113,12 +239,44 @@ class NotebookDrawer(Designer):
             ax (plt.axes): plt.axes to show in the designer
         """
         self.ax = ax
-        self.ax.grid()
 
         # Default sizes for the plot, feel free to change
         self.ax.set_xlim([-1700, 1700]) 
         self.ax.set_ylim([-700, 700])
 
+        # The limits are fixed, so mpl doesn't have to recalculate them for every shape
+        self.ax.set_autoscale_on(False)
+
+        # Convert the colors once instead of for every shape
+        self.layer_colors = [to_rgba(color) for color in COLORS]
+
+        # Boxes and marker positions per layer that still need to be drawn, they are all drawn at once by flush
+        self.pending_boxes = {}
+        self.pending_markers = {}
+
+    def flush(self) -> None:
+        """Draw all pending boxes, one collection per layer."""
+        # Take the pending shapes first, so a failing flush doesn't draw the same layers again next time
+        pending_boxes, self.pending_boxes = self.pending_boxes, {}
+        pending_markers, self.pending_markers = self.pending_markers, {}
+
+        for layerIdx, boxes in pending_boxes.items():
+            self.ax.add_collection(PolyCollection(boxes_to_vertices(boxes), color=self.layer_colors[layerIdx]), autolim=False)
+
+        # Marker circles with a radius of 25, sized in data units like the boxes
+        for layerIdx, positions in pending_markers.items():
+            self.ax.add_collection(EllipseCollection(
+                50, 50, 0,
+                units= 'xy',
+                offsets= positions,
+                offset_transform= self.ax.transData,
+                facecolors= 'none',
+                edgecolors= self.layer_colors[layerIdx]
+            ), autolim=False)
+
+        # The grid is only needed once everything is there
+        self.ax.grid(True)
+
     def render_vernier(self, x:int, y:int, ms_spacing:float, vs_spacing:float, width:int, ms_layerIdx:int, vs_layerIdx:int, max_length:int, orientation:ORIENTATION) -> None:
         """Render a vernier scale based on given coordinates, sizes and orientation in a mpl graph.
 
@@ -131,64 +289,11 @@ class NotebookDrawer(Designer):
             orientation (ORIENTATION): the orientation of the scale in cardinal directions
             ax (plt.axis): the axis on which needs to be drawn
         """
-        MID_TICK_HEIGHT = 50 # micrometer
-        
-        mid_tick_orientation_coords = {
-            ORIENTATION.TOP : [((x, y), width, MID_TICK_HEIGHT), ((x, y), width, -MID_TICK_HEIGHT)],
-            ORIENTATION.BOTTOM : [((x, y), width, -MID_TICK_HEIGHT), ((x, y), width, MID_TICK_HEIGHT)],
-            ORIENTATION.LEFT : [((x, y), -MID_TICK_HEIGHT, width), ((x, y), MID_TICK_HEIGHT, width)],
-            ORIENTATION.RIGHT : [((x, y), MID_TICK_HEIGHT, width), ((x, y), -MID_TICK_HEIGHT, width)]
-        }
-        
-        # Assigning coordinates for main and vernier scale based on orientation
-        ms_coords, vs_coords = mid_tick_orientation_coords[orientation]
-        
-        # Make the centerline for the mainscale
-        self.ax.add_patch(Rectangle(*ms_coords, color=COLORS[ms_layerIdx]))
+        ms_ticks, vs_ticks = get_vernier_ticks(x, y, ms_spacing, vs_spacing, width, max_length, orientation)
 
-        # Make the centerline for the vernierscale
-        self.ax.add_patch(Rectangle(*vs_coords, color=COLORS[vs_layerIdx]))
-        
-        # Determine the amount of ticks/stalke there will be
-        number_of_stalks = max_length / (width + ms_spacing)
-        for n in range(1, int(np.ceil(number_of_stalks / 2))):
-            height = 40 if n % 10 == 0 else 25  # height in micrometers
-            
-            # Calculate coordinates for main scale positive and negative side and smae for the verniers in each orientation
-            # Good possibilty this can be made in a better way
-            reg_ticks_orientation_coords = {
-                ORIENTATION.TOP: {
-                    "ms_p_tick": ((x + n*(width + ms_spacing), y), width, height),
-                    "ms_n_tick": ((x + width / 2 - n*(width + ms_spacing), y), width, height),
-                    "vs_p_tick": ((x + n*(width + vs_spacing), y), width, -height),
-                    "vs_n_tick": ((x + width / 2 - n*(width + vs_spacing), y), width, -height)
-                },
-                ORIENTATION.BOTTOM: {
-                    "ms_p_tick": ((x + n*(width + ms_spacing), y), width, -height),
-                    "ms_n_tick": ((x + width / 2 - n*(width + ms_spacing), y), width, -height),
-                    "vs_p_tick": ((x + n*(width + vs_spacing), y), width, height),
-                    "vs_n_tick": ((x + width / 2 - n*(width + vs_spacing), y), width, height)
-                },
-                ORIENTATION.LEFT: {
-                    "ms_p_tick": ((x, y +n*(width+ms_spacing) - width/2), -height, width),
-                    "ms_n_tick": ((x, y+width/2-n*(width+ms_spacing)), -height, width),
-                    "vs_p_tick": ((x, y +n*(width+vs_spacing) - width/2), height, width),
-                    "vs_n_tick": ((x, y+width/2-n*(width+vs_spacing)), height, width)
-                },
-                ORIENTATION.RIGHT: {
-                    "ms_p_tick": ((x, y +n*(width+ms_spacing) - width/2), height, width),
-                    "ms_n_tick": ((x, y+width/2-n*(width+ms_spacing)), height, width),
-                    "vs_p_tick": ((x, y +n*(width+vs_spacing) - width/2), -height, width),
-                    "vs_n_tick": ((x, y+width/2-n*(width+vs_spacing)), -height, width)
-                }
-            }
-            ms_p_tick, ms_n_tick, vs_p_tick, vs_n_tick = reg_ticks_orientation_coords[orientation].values()
-
-            # Draw rectangles at given coordinates
-            self.ax.add_patch(Rectangle(*ms_p_tick, color=COLORS[ms_layerIdx]))
-            self.ax.add_patch(Rectangle(*ms_n_tick, color=COLORS[ms_layerIdx]))
-            self.ax.add_patch(Rectangle(*vs_p_tick, color=COLORS[vs_layerIdx]))
-            self.ax.add_patch(Rectangle(*vs_n_tick, color=COLORS[vs_layerIdx]))
+        # The ticks are drawn together with the rest of their layer on flush
+        self.pending_boxes.setdefault(ms_layerIdx, []).extend(ms_ticks)
+        self.pending_boxes.setdefault(vs_layerIdx, []).extend(vs_ticks)
 
     def render_bar(self, x:int, y:int, width:int, height:int, layerIdx:int) -> None:
         """Draw the bar in the notebook
@@ -200,7 +305,19 @@ class NotebookDrawer(Designer):
             height (int): What is the height of this bar
             layer (int): On what layer is the bar made
         """
-        self.ax.add_patch(Rectangle((x - width/2, y - height / 2), width, height, color=COLORS[layerIdx]))
+        self.pending_boxes.setdefault(layerIdx, []).append((x - width/2, y - height/2, x + width/2, y + height/2))
+
+    def render_cross(self, x:int, y:int, width:int, height:int, layerIdx:int) -> None:
+        """Draw the cross in the notebook
+
+        Args:
+            x (int): What is the x position of the midpoint of this cross
+            y (int): What is the y position of the midpoint of this cross
+            width (int): What is the width of this cross
+            height (int): What is the height of this cross
+            layer (int): On what layer is the cross made
+        """
+        self.pending_boxes.setdefault(layerIdx, []).extend(get_cross_boxes(x, y, width, height))
 
     def render_marker(self, x:int, y:int, layerIdx:int) -> None:
         """Draw a marker icon on the marker x and y position.
@@ -210,9 +327,27 @@ class NotebookDrawer(Designer):
             y (int): What is the y position of the midpoint of this marker
             layer (int): On what layer is the marker made
         """
-        self.ax.add_patch(Circle((x, y), 25, color=COLORS[layerIdx], fill=False))
-        self.render_bar(x, y, 2, 100, layerIdx)
-        self.render_bar(x, y, 100, 2, layerIdx)
+        # The circles are drawn together on flush, the cross hair goes with the other boxes
+        self.pending_markers.setdefault(layerIdx, []).append((x, y))
+        self.render_cross(x, y, 2, 100, layerIdx)
+
+class NullDrawer():
+    """Stand in for the NotebookDrawer when there are no axes to draw on, it draws nothing."""
+
+    def render_vernier(self, *args, **kwargs) -> None:
+        pass
+
+    def render_bar(self, *args, **kwargs) -> None:
+        pass
+
+    def render_cross(self, *args, **kwargs) -> None:
+        pass
+
+    def render_marker(self, *args, **kwargs) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
 
 class KlayoutDrawer(Designer):
     """Class that hold all functions to draw the layout in the Klayout file
@@ -228,7 +363,7 @@ class KlayoutDrawer(Designer):
             layout (db.Layout): A pya layout.
             dbu (float): Data base unit, so what size in microns is one unit.
             layer_amount (int): How many layers are there in the design
-            temp_filename (str): Temporary filename
+            temp_filename (str): Temporary filename, not written anymore but kept so existing notebooks keep working
             marker_filename (str): Filename of the marker
             output_filename (str): Filename of the final result
         """
@@ -241,6 +376,12 @@ class KlayoutDrawer(Designer):
         self.top = self.layout.create_cell("TopCell")
         self.layers = self.construct_layers(layer_amount)
 
+        # Keep the shapes container of every layer around so we don't look it up for every shape
+        self.shape_containers = [self.top.shapes(layer) for layer in self.layers]
+
+        # Cell index of the imported marker, the marker file is only read on the first marker call
+        self.marker_index = None
+
     def construct_layers(self, layer_amount:int) -> list:
         """Construct the layers we need
 
@@ -266,7 +407,19 @@ class KlayoutDrawer(Designer):
             layer (int): On what layer is the bar made
         """
         box = pya.DBox(x - width/2, y + height/2, x+width/2, y - height/2)
-        self.top.shapes(self.layers[layerIdx]).insert(box)
+        self.shape_containers[layerIdx].insert(box)
+
+    def construct_cross(self, x:int, y:int, width:int, height:int, layerIdx:int) -> None:
+        """Draw the cross in the file, both bars in one insert
+
+        Args:
+            x (int): What is the x position of the midpoint of this cross
+            y (int): What is the y position of the midpoint of this cross
+            width (int): What is the width of this cross
+            height (int): What is the height of this cross
+            layer (int): On what layer is the cross made
+        """
+        self.construct_boxes(get_cross_boxes(x, y, width, height), layerIdx)
 
     def construct_vernier(self, x:int, y:int, ms_spacing:float, vs_spacing:float, width, ms_layerIdx:int, vs_layerIdx:int, max_length:int, orientation:ORIENTATION):
         """Construct a vernier scale based on given coordinates, sizes and orientation.
@@ -279,107 +432,69 @@ class KlayoutDrawer(Designer):
             max_length (int): the maximum length the scale is allowed to be
             orientation (ORIENTATION): the orientation of the scale in cardinal directions
         """
-        #width = 10 # micrometer
-        MID_TICK_HEIGHT = 50 # micrometer
+        ms_ticks, vs_ticks = get_vernier_ticks(x, y, ms_spacing, vs_spacing, width, max_length, orientation)
 
-        mid_tick_orientation_coords = {
-            ORIENTATION.TOP : [(x- width/2, y, x+width/2, y+ MID_TICK_HEIGHT), (x- width/2, y-MID_TICK_HEIGHT, x+ width/2, y)],
-            ORIENTATION.BOTTOM: [(x- width/2, y-MID_TICK_HEIGHT, x + width/2, y), (x- width/2, y, x + width/2, y+MID_TICK_HEIGHT)],
-            ORIENTATION.LEFT: [(x, y- width/2, x-MID_TICK_HEIGHT, y +width/2), (x+MID_TICK_HEIGHT, y- width/2, x, y+width/2)],
-            ORIENTATION.RIGHT: [(x+MID_TICK_HEIGHT, y- width/2, x, y + width/2), (x, y- width/2, x-MID_TICK_HEIGHT, y + width/2)]
-        }
+        # Add shape to its respective layer
+        self.construct_boxes(ms_ticks, ms_layerIdx)
+        self.construct_boxes(vs_ticks, vs_layerIdx)
 
-        # Assigning coordinates for main and vernier scale based on orientation
-        ms_coords, vs_coords = mid_tick_orientation_coords[orientation]
+    def construct_boxes(self, boxes:np.ndarray, layerIdx:int) -> None:
+        """Insert multiple boxes in one go, so the shapes container is looked up once and pya
+        does the inserting on its own side.
 
-        # Make the centerline for the mainscale
-        ms_main_tick = pya.DBox(*ms_coords)
+        Args:
+            boxes (np.ndarray): Array with a (left, bottom, right, top) row per box in micrometers
+            layerIdx (int): On what layer are the boxes made
+        """
+        # Convert all boxes to integer database units in one go, so pya only gets plain ints
+        coords = to_dbu(boxes, self.layout.dbu)
+        region = pya.Region([pya.Box(*box) for box in coords.tolist()])
+        self.shape_containers[layerIdx].insert(region)
 
-        # Make the centerline for the vernierscale
-        vs_main_tick = pya.DBox(*vs_coords)
+    def import_cell(self, layout:pya.Layout, filename:str) -> pya.Cell:
+        """Copy the top cell of a GDS file into the given layout.
 
-        # Add shape to its respective layer
-        self.top.shapes(self.layers[ms_layerIdx]).insert(ms_main_tick)
-        self.top.shapes(self.layers[vs_layerIdx]).insert(vs_main_tick)
-
-        # Determine the amount of ticks/stalke there will be
-        number_of_ticks = max_length / (width + ms_spacing)
-        for n in range(1, int(np.ceil(number_of_ticks / 2))):
-            height = 40 if n % 10 == 0 else 25  # height in micrometers
-
-            # Calculate coordinates for main scale positive and negative side and smae for the verniers in each orientation
-            # Good possibilty this can be made in a better way
-            reg_ticks_orientation_coords = {
-                ORIENTATION.TOP: {
-                    "ms_p_tick": (x + n * (width + ms_spacing) - width / 2, y, x + ((n + 1) * width) + n * ms_spacing - width / 2, y + height),
-                    "ms_n_tick": (x + width / 2 - n * (width + ms_spacing), y, x + width / 2 - ((n + 1) * width) - n * ms_spacing, y + height),
-                    "vs_p_tick": (x + n * (width + vs_spacing) - width / 2, y - height, x + ((n + 1) * width) + n * vs_spacing - width / 2, y),
-                    "vs_n_tick": (x + width / 2 - n * (width + vs_spacing), y - height, x + width / 2 - ((n + 1) * width) - n * vs_spacing, y)
-                },
-                ORIENTATION.BOTTOM: {
-                    "ms_p_tick": (x + n * (width + ms_spacing) - width / 2, y - height, x + ((n + 1) * width) + n * ms_spacing - width / 2, y),
-                    "ms_n_tick": (x + width / 2 - n * (width + ms_spacing), y - height, x + width / 2 - ((n + 1) * width) - n * ms_spacing, y),
-                    "vs_p_tick": (x + n * (width + vs_spacing) - width / 2, y, x + ((n + 1) * width) + n * vs_spacing - width / 2, y + height),
-                    "vs_n_tick": (x + width / 2 - n * (width + vs_spacing), y, x + width / 2 - ((n + 1) * width) - n * vs_spacing, y + height)
-                },
-                ORIENTATION.RIGHT: {
-                    "ms_p_tick": (x + height, y + n * (width + ms_spacing) - width / 2, x, y + ((n + 1) * width) + n * ms_spacing - width / 2),
-                    "ms_n_tick": (x + height, y + width / 2 - n * (width + ms_spacing), x, y + width / 2 - ((n + 1) * width) - n * ms_spacing),
-                    "vs_p_tick": (x, y + n * (width + vs_spacing) - width / 2, x - height, y + ((n + 1) * width) + n * vs_spacing - width / 2),
-                    "vs_n_tick": (x, y + width / 2 - n * (width + vs_spacing), x - height, y + width / 2 - ((n + 1) * width) - n * vs_spacing)
-                },
-                ORIENTATION.LEFT: {
-                    "ms_p_tick": (x, y + n * (width + ms_spacing) - width / 2, x - height, y + ((n + 1) * width) + n * ms_spacing - width / 2),
-                    "ms_n_tick": (x, y + width / 2 - n * (width + ms_spacing), x - height, y + width / 2 - ((n + 1) * width) - n * ms_spacing),
-                    "vs_p_tick": (x + height, y + n * (width + vs_spacing) - width / 2, x, y + ((n + 1) * width) + n * vs_spacing - width / 2),
-                    "vs_n_tick": (x + height, y + width / 2 - n * (width + vs_spacing), x, y + width / 2 - ((n + 1) * width) - n * vs_spacing)
-                }
-            }
-
-            # Assigning coordinates for main and vernier scale based (negative an positive direction) on orientation
-            ms_p_tick, ms_n_tick, vs_p_tick, vs_n_tick = reg_ticks_orientation_coords[orientation].values()
-            
-            # Make all boxes in negative an positive direction
-            ms_p_tick = pya.DBox(*ms_p_tick)
-            ms_n_tick = pya.DBox(*ms_n_tick)
-            vs_p_tick = pya.DBox(*vs_p_tick)
-            vs_n_tick = pya.DBox(*vs_n_tick)
-
-            # Add shape to its respective layer
-            self.top.shapes(self.layers[ms_layerIdx]).insert(ms_p_tick)
-            self.top.shapes(self.layers[ms_layerIdx]).insert(ms_n_tick)
-            self.top.shapes(self.layers[vs_layerIdx]).insert(vs_p_tick)
-            self.top.shapes(self.layers[vs_layerIdx]).insert(vs_n_tick)
+        Args:
+            layout (pya.Layout): The layout to copy the cell into
+            filename (str): The GDS file to read
+
+        Returns:
+            pya.Cell: The copied cell in the given layout
+        """
+        layout_import = pya.Layout()
+        layout_import.read(filename)
+        
+        imported_top_cell = layout_import.top_cell()
+        target_cell = layout.create_cell(imported_top_cell.name)
+        target_cell.copy_tree(imported_top_cell)
+        
+        layout_import._destroy()
+        return target_cell
 
     def construct_marker(self, *positions:tuple) -> None:
-        """Construct the marker in the Klaout design at given positions
+        """Construct the marker in the Klaout design at given positions.
+        The markers are added to the layout in memory, so markers from earlier calls stay in the output.
         """
 
-        layout = pya.Layout()
-        top_cell = layout.create_cell("TOP")
-        
-        x = 0
-        y = 0
-        files = [self.temp_filename] + [self.marker_filename] * len(positions)
-        for idx, file in enumerate(files):
-            layout_import = pya.Layout()
-            layout_import.read(file)
-            
-            imported_top_cell = layout_import.top_cell()
-            target_cell = layout.create_cell(imported_top_cell.name)
-            target_cell.copy_tree(imported_top_cell)
-            
-            layout_import._destroy()
-
-            inst = pya.DCellInstArray(target_cell.cell_index(), pya.DTrans(db.DVector(x, y)))
-            top_cell.insert(inst)
-            
-            x = positions[idx-1][0]
-            y = positions[idx-1][1]
-        layout.write(self.output_filename)
+        # The design is still in memory, so add the markers to it directly instead of
+        # reading it back from the temp file.
+        # Every marker is the same cell, so read it once and only place instances of it
+        if self.marker_index is None:
+            self.marker_index = self.import_cell(self.layout, self.marker_filename).cell_index()
+        marker_index = self.marker_index
+
+        grid = get_regular_grid(positions, self.layout.dbu)
+        if grid is not None:
+            # Markers on an exact regular grid fit in a single array instance, the grid is in database units
+            x, y, dx, dy, nx, ny = grid
+            self.top.insert(pya.CellInstArray(marker_index, pya.Trans(pya.Vector(x, y)), pya.Vector(dx, 0), pya.Vector(0, dy), nx, ny))
+        else:
+            for x, y in positions:
+                self.top.insert(pya.DCellInstArray(marker_index, pya.DTrans(db.DVector(x, y))))
+        self.layout.write(self.output_filename)
 
     def draw(self) -> None:
         """Draw the layout"""
-        self.layout.write(self.temp_filename)
+        # construct_marker works on the layout in memory, so there is no need for the temp file anymore
         self.layout.write(self.output_filename)
     
\ No newline at end of file